@@ -1,11 +1,20 @@
-from flask import Flask, render_template, request, jsonify, session, redirect
+from flask import Flask, render_template, request, jsonify, session, redirect, Response
 from functools import wraps
 import sqlite3
+import csv
+import io
+import itertools
+import json
+import math
+import queue
+import threading
+import time
+from collections import deque
 import os 
 import random
 import hashlib
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from urllib.parse import urlparse
 
 app = Flask(__name__)
@@ -75,7 +84,9 @@ def init_db():
                       timestamp VARCHAR(255) NOT NULL,
                       ip_address VARCHAR(255),
                       upi_id TEXT,
-                      order_id TEXT)''')
+                      order_id TEXT,
+                      paid_at VARCHAR(255),
+                      payment_ref TEXT)''')
         
         c.execute('''CREATE TABLE IF NOT EXISTS orders
                      (id SERIAL PRIMARY KEY,
@@ -86,14 +97,14 @@ def init_db():
                       is_used INTEGER DEFAULT 0)''')
         
         # Add columns if they don't exist (PostgreSQL)
-        try:
-            c.execute("ALTER TABLE spins ADD COLUMN upi_id TEXT")
-        except Exception:
-            pass
-        try:
-            c.execute("ALTER TABLE spins ADD COLUMN order_id TEXT")
-        except Exception:
-            pass
+        # A failed statement aborts the whole transaction in PostgreSQL, so use
+        # IF NOT EXISTS rather than catching "column already exists" errors
+        c.execute("ALTER TABLE spins ADD COLUMN IF NOT EXISTS upi_id TEXT")
+        c.execute("ALTER TABLE spins ADD COLUMN IF NOT EXISTS order_id TEXT")
+        c.execute("ALTER TABLE spins ADD COLUMN IF NOT EXISTS paid_at VARCHAR(255)")
+        c.execute("ALTER TABLE spins ADD COLUMN IF NOT EXISTS payment_ref TEXT")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_spins_payment_ref ON spins (payment_ref)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_spins_upi_id_lower ON spins (LOWER(upi_id))")
     else:
         # SQLite syntax
         c.execute('''CREATE TABLE IF NOT EXISTS spins
@@ -103,7 +114,9 @@ def init_db():
                       timestamp TEXT NOT NULL,
                       ip_address TEXT,
                       upi_id TEXT,
-                      order_id TEXT)''')
+                      order_id TEXT,
+                      paid_at TEXT,
+                      payment_ref TEXT)''')
         
         c.execute('''CREATE TABLE IF NOT EXISTS orders
                      (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -122,12 +135,149 @@ def init_db():
             c.execute("ALTER TABLE spins ADD COLUMN order_id TEXT")
         except sqlite3.OperationalError:
             pass
+        try:
+            c.execute("ALTER TABLE spins ADD COLUMN paid_at TEXT")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            c.execute("ALTER TABLE spins ADD COLUMN payment_ref TEXT")
+        except sqlite3.OperationalError:
+            pass
+        
+        # Reconciliation looks up paid spins by reference and UPI ID
+        c.execute("CREATE INDEX IF NOT EXISTS idx_spins_payment_ref ON spins (payment_ref)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_spins_upi_id_lower ON spins (LOWER(upi_id))")
     
     conn.commit()
     conn.close()
 
+# Live admin dashboard updates (Server-Sent Events)
+# Each connected admin tab gets its own bounded queue. Write paths publish
+# small events after commit, so open tabs never touch the database.
+# Payloads never carry order IDs: an unused order ID is enough to spin.
+SSE_QUEUE_SIZE = 100         # Max pending events per admin tab
+SSE_REPLAY_SIZE = 100        # Recent events kept for replay after a reconnect
+SSE_HEARTBEAT_SECONDS = 15   # Keep-alive comment interval for idle streams
+SSE_STREAM_SECONDS = 300     # Streams close after this long so reconnects re-check the login
+SSE_SNAPSHOT_ATTEMPTS = 3    # Snapshot retries before briefly holding off writers
+
+def format_sse(event, data, event_id=None):
+    """Format one Server-Sent Events message"""
+    message = f"event: {event}\ndata: {json.dumps(data)}\n"
+    if event_id is not None:
+        message = f"id: {event_id}\n" + message
+    return message + "\n"
+
+class AdminEventBroker:
+    """In-process pub/sub for admin dashboard events"""
+
+    def __init__(self, maxsize=SSE_QUEUE_SIZE, replay_size=SSE_REPLAY_SIZE):
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # Event ids are "<epoch>-<n>" so ids from a restarted process never match
+        self._epoch = os.urandom(4).hex()
+        self._recent = deque(maxlen=min(replay_size, maxsize))
+        # Write paths hold this across commit + publish, so no commit is ever
+        # visible without its event having an id
+        self.commit_lock = threading.Lock()
+
+    def last_event_id(self):
+        """Id of the latest published event"""
+        with self._lock:
+            return f"{self._epoch}-{self._next_id}"
+
+    def snapshot(self, load, attempts=SSE_SNAPSHOT_ATTEMPTS):
+        """Run `load` and return (result, last event id) that agree exactly
+        
+        Every event up to the id is in the result and no later one is, so
+        replaying from the id neither misses nor double counts a write.
+        """
+        for _ in range(attempts):
+            before = self.last_event_id()
+            result = load()
+            # Waits out any write between its commit and its publish
+            with self.commit_lock:
+                after = self.last_event_id()
+            if after == before:
+                return result, before
+        # Writes kept landing mid-read: hold them off for one last read
+        with self.commit_lock:
+            return load(), self.last_event_id()
+
+    def subscribe(self, last_event_id=None):
+        """Register a new admin tab and return its event queue
+        
+        Events published after `last_event_id` are replayed into the queue.
+        If they are no longer buffered (or the id is from another process)
+        the tab gets a 'resync' event instead.
+        """
+        q = queue.Queue(maxsize=self.maxsize)
+        with self._lock:
+            if last_event_id:
+                missed = self._missed_since(last_event_id)
+                if missed is None:
+                    q.put_nowait(format_sse('resync', {}))
+                else:
+                    for message in missed:
+                        q.put_nowait(message)
+            self._subscribers.add(q)
+        return q
+
+    def _missed_since(self, last_event_id):
+        epoch, _, seen = last_event_id.partition('-')
+        if epoch != self._epoch or not seen.isdigit() or int(seen) > self._next_id:
+            return None
+        seen = int(seen)
+        oldest = self._recent[0][0] if self._recent else self._next_id + 1
+        if seen + 1 < oldest:
+            return None
+        return [message for event_id, message in self._recent if event_id > seen]
+
+    def unsubscribe(self, q):
+        """Remove an admin tab when its stream closes"""
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event, data):
+        """Push an event to every connected admin tab without blocking"""
+        with self._lock:
+            self._next_id += 1
+            message = format_sse(event, data, f"{self._epoch}-{self._next_id}")
+            self._recent.append((self._next_id, message))
+            subscribers = list(self._subscribers)
+        
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow tab: drop its backlog and tell it to reload a fresh snapshot
+                self._reset_queue(q)
+
+    def _reset_queue(self, q):
+        try:
+            while True:
+                q.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            q.put_nowait(format_sse('resync', {}))
+        except queue.Full:
+            pass
+
+admin_events = AdminEventBroker()
+
+def publish_admin_event(event, data=None, deltas=None):
+    """Publish a dashboard event with optional stat counter deltas"""
+    payload = dict(data or {})
+    if deltas:
+        payload['deltas'] = deltas
+    admin_events.publish(event, payload)
+
 # Prize values (12 segments) - ₹30 is Jackpot
 PRIZES = [1, 5, 10, 15, 20, 25, 30, 40, 50, 60, 75, 100]
+JACKPOT_PRIZE = 30
 
 # Probability configuration (admin variable)
 # Users will only get ₹1-₹10 prizes
@@ -180,13 +330,14 @@ def has_user_spun(user_id, order_id=None):
     conn.close()
     return count > 0
 
-def select_prize():
-    """Select prize based on probability weights - only ₹1-₹10 for regular users"""
+def select_prize(probabilities=None):
+    """Select prize based on probability weights (defaults to PRIZE_PROBABILITIES)"""
+    probabilities = probabilities or PRIZE_PROBABILITIES
     # Filter out prizes with 0 weight (disabled prizes)
-    available_prizes = [p for p, w in PRIZE_PROBABILITIES.items() if w > 0]
-    available_weights = [PRIZE_PROBABILITIES[p] for p in available_prizes]
+    available_prizes = [p for p, w in probabilities.items() if w > 0]
+    available_weights = [probabilities[p] for p in available_prizes]
     
-    # Select prize based on weighted random (only ₹1-₹20 will be selected)
+    # Select prize based on weighted random (0-weight prizes are never selected)
     selected = random.choices(available_prizes, weights=available_weights, k=1)[0]
     return selected
 
@@ -197,6 +348,10 @@ def record_spin(user_id, prize, order_id=None):
     timestamp = datetime.now().isoformat()
     ip_address = request.remote_addr
     
+    # Needed for the live "Total Users" counter on the admin dashboard
+    c.execute("SELECT 1 FROM spins WHERE user_id = %s LIMIT 1" if USE_POSTGRES else "SELECT 1 FROM spins WHERE user_id = ? LIMIT 1", (user_id,))
+    is_new_user = c.fetchone() is None
+    
     # If order_id provided, mark it as used
     if order_id:
         if USE_POSTGRES:
@@ -217,9 +372,223 @@ def record_spin(user_id, prize, order_id=None):
             c.execute("INSERT INTO spins (user_id, prize, timestamp, ip_address) VALUES (?, ?, ?, ?)",
                       (user_id, prize, timestamp, ip_address))
     
-    conn.commit()
+    with admin_events.commit_lock:
+        conn.commit()
+        publish_admin_event('spin', {
+            'prize': prize,
+            'timestamp': timestamp
+        }, deltas={
+            'total_spins': 1,
+            'total_users': 1 if is_new_user else 0,
+            'total_amount': prize
+        })
+        if order_id:
+            publish_admin_event('order_used', {'used_at': timestamp},
+                                deltas={'used_orders': 1, 'available_orders': -1})
     conn.close()
 
+# Payout reconciliation against bank/UPI settlement files
+RECONCILE_WINDOW_DAYS = 7      # Settlement must land within this many days of the spin
+RECONCILE_BATCH_SIZE = 500     # Rows per batched UPDATE
+RECONCILE_REPORT_LIMIT = 200   # Max rows listed per category in the report
+
+# Accepted header names for each settlement column (case-insensitive)
+SETTLEMENT_COLUMNS = {
+    'upi_id': ('upi_id', 'upi', 'vpa', 'payee_vpa', 'beneficiary_vpa'),
+    'amount': ('amount', 'txn_amount', 'paid_amount'),
+    'date': ('date', 'settlement_date', 'txn_date', 'value_date'),
+    'reference': ('reference', 'utr', 'rrn', 'txn_id', 'ref')
+}
+SETTLEMENT_DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%b-%Y')
+
+def parse_settlement_date(value):
+    """Parse a settlement date in any of the common bank formats"""
+    value = (value or '').strip()
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        pass
+    for fmt in SETTLEMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def map_settlement_columns(fieldnames):
+    """Map settlement columns to their header names, or None if one is missing"""
+    headers = {(name or '').strip().lower(): name for name in fieldnames or []}
+    columns = {}
+    for column, aliases in SETTLEMENT_COLUMNS.items():
+        columns[column] = next((headers[a] for a in aliases if a in headers), None)
+    if not (columns['upi_id'] and columns['amount'] and columns['date']):
+        return None
+    return columns
+
+def load_unpaid_spins(c):
+    """Build the hash-join table of unpaid spins keyed by (upi_id, amount)"""
+    c.execute("SELECT id, upi_id, prize, timestamp FROM spins WHERE paid_at IS NULL AND upi_id IS NOT NULL AND upi_id != ''")
+    unpaid = {}
+    for spin_id, upi_id, prize, timestamp in c.fetchall():
+        key = (upi_id.strip().lower(), int(prize))
+        unpaid.setdefault(key, []).append((datetime.fromisoformat(timestamp).date(), spin_id))
+    for candidates in unpaid.values():
+        candidates.sort()
+    return unpaid
+
+def lookup_paid_spins(c, references, upi_ids, paid_at):
+    """Fetch spins paid before this run that share a reference or UPI ID with a chunk of rows"""
+    paid = {}
+    paid_refs = {}
+    if references:
+        if USE_POSTGRES:
+            c.execute("SELECT payment_ref, paid_at FROM spins WHERE payment_ref = ANY(%s) AND paid_at != %s",
+                      (list(references), paid_at))
+        else:
+            marks = ', '.join('?' * len(references))
+            c.execute(f"SELECT payment_ref, paid_at FROM spins WHERE payment_ref IN ({marks}) AND paid_at != ?",
+                      (*references, paid_at))
+        paid_refs = {payment_ref: spin_paid_at for payment_ref, spin_paid_at in c.fetchall()}
+    if upi_ids:
+        if USE_POSTGRES:
+            c.execute("SELECT upi_id, prize, timestamp, paid_at FROM spins WHERE LOWER(upi_id) = ANY(%s) AND paid_at IS NOT NULL AND paid_at != %s",
+                      (list(upi_ids), paid_at))
+        else:
+            marks = ', '.join('?' * len(upi_ids))
+            c.execute(f"SELECT upi_id, prize, timestamp, paid_at FROM spins WHERE LOWER(upi_id) IN ({marks}) AND paid_at IS NOT NULL AND paid_at != ?",
+                      (*upi_ids, paid_at))
+        for upi_id, prize, timestamp, spin_paid_at in c.fetchall():
+            key = (upi_id.strip().lower(), int(prize))
+            paid.setdefault(key, []).append((datetime.fromisoformat(timestamp).date(), spin_paid_at))
+    return paid, paid_refs
+
+def reconcile_settlement(c, rows, columns, window_days=RECONCILE_WINDOW_DAYS):
+    """Match settlement rows to unpaid spins in one pass and mark matches paid
+    
+    Memory is bounded by the unpaid spins, not the settlement file: rows are
+    consumed in chunks of RECONCILE_BATCH_SIZE and only counts plus a capped
+    sample are kept. Already-paid spins are looked up per chunk, so rows that
+    repeat a paid spin or reference are reported as duplicates.
+    """
+    unpaid = load_unpaid_spins(c)
+    # Prizes each UPI ID still has unpaid spins for, kept in step with
+    # `unpaid` so over-payments are judged against what is left
+    unpaid_prizes = {}
+    for upi_id, prize in unpaid:
+        unpaid_prizes.setdefault(upi_id, set()).add(prize)
+    matched_keys = set()
+    # References of rows matched in this file; a repeat would pay a second spin
+    matched_refs = set()
+    window = timedelta(days=window_days)
+    paid_at = datetime.now().isoformat()
+    
+    report = {'rows': 0, 'matched': 0, 'unmatched': 0, 'duplicate': 0, 'over_paid': 0}
+    details = {'unmatched': [], 'duplicate': [], 'over_paid': []}
+    batch = []
+    
+    def flag(category, line, upi_id, amount, reason):
+        report[category] += 1
+        if len(details[category]) < RECONCILE_REPORT_LIMIT:
+            details[category].append({'line': line, 'upi_id': upi_id, 'amount': amount, 'reason': reason})
+    
+    def flush():
+        # Count what the UPDATEs actually changed: a concurrent reconcile may
+        # have paid some of these spins since they were loaded
+        if USE_POSTGRES:
+            from psycopg2.extras import execute_batch
+            execute_batch(c, "UPDATE spins SET paid_at = %s, payment_ref = %s WHERE id = %s AND paid_at IS NULL",
+                          batch, page_size=RECONCILE_BATCH_SIZE)
+            # execute_batch only reports the rowcount of its last page
+            c.execute("SELECT COUNT(*) FROM spins WHERE paid_at = %s AND id = ANY(%s)",
+                      (paid_at, [spin_id for _, _, spin_id in batch]))
+            updated = c.fetchone()[0]
+        else:
+            c.executemany("UPDATE spins SET paid_at = ?, payment_ref = ? WHERE id = ? AND paid_at IS NULL", batch)
+            updated = c.rowcount
+        report['matched'] += updated
+        # Lost the race to another reconcile, so these rows were already paid
+        report['duplicate'] += len(batch) - updated
+        batch.clear()
+    
+    # Line 1 is the header
+    numbered = enumerate(rows, start=2)
+    for chunk in iter(lambda: list(itertools.islice(numbered, RECONCILE_BATCH_SIZE)), []):
+        parsed = []
+        for line, row in chunk:
+            report['rows'] += 1
+            upi_id = (row.get(columns['upi_id']) or '').strip()
+            raw_amount = (row.get(columns['amount']) or '').strip()
+            settled_on = parse_settlement_date(row.get(columns['date']))
+            reference = (row.get(columns['reference']) or '').strip() if columns['reference'] else ''
+            
+            try:
+                amount = float(raw_amount.replace(',', ''))
+                if not math.isfinite(amount):
+                    raise ValueError(raw_amount)
+            except ValueError:
+                flag('unmatched', line, upi_id, raw_amount, 'Invalid amount')
+                continue
+            if not upi_id or settled_on is None:
+                flag('unmatched', line, upi_id, raw_amount, 'Missing UPI ID or invalid date')
+                continue
+            parsed.append((line, upi_id, raw_amount, amount, settled_on, reference))
+        
+        paid, paid_refs = lookup_paid_spins(c,
+                                            {reference for *_, reference in parsed if reference},
+                                            {upi_id.lower() for _, upi_id, *_ in parsed},
+                                            paid_at)
+        paid_upis = {upi_key for upi_key, _ in paid}
+        
+        for line, upi_id, raw_amount, amount, settled_on, reference in parsed:
+            if reference in matched_refs:
+                flag('duplicate', line, upi_id, raw_amount, 'Reference repeated earlier in this file')
+                continue
+            if reference in paid_refs:
+                flag('duplicate', line, upi_id, raw_amount, f'Reference already paid on {paid_refs[reference][:10]}')
+                continue
+            
+            upi_key = upi_id.lower()
+            key = (upi_key, int(amount)) if amount == int(amount) else None
+            candidates = unpaid.get(key, []) if key else []
+            match = next((i for i, (spun_on, _) in enumerate(candidates)
+                          if spun_on <= settled_on <= spun_on + window), None)
+            
+            if match is not None:
+                spin_id = candidates.pop(match)[1]
+                if not candidates:
+                    del unpaid[key]
+                    unpaid_prizes[upi_key].discard(key[1])
+                matched_keys.add(key)
+                if reference:
+                    matched_refs.add(reference)
+                batch.append((paid_at, reference or None, spin_id))
+                continue
+            
+            paid_on = next((spin_paid_at for spun_on, spin_paid_at in paid.get(key, [])
+                            if spun_on <= settled_on <= spun_on + window), None)
+            remaining = unpaid_prizes.get(upi_key)
+            if paid_on:
+                flag('duplicate', line, upi_id, raw_amount, f'Already paid on {paid_on[:10]}')
+            elif candidates:
+                flag('unmatched', line, upi_id, raw_amount, 'No unpaid spin within the date window')
+            elif key in matched_keys:
+                # Earlier rows in this file already paid every spin of this amount
+                flag('over_paid', line, upi_id, raw_amount, f'No unpaid ₹{key[1]} spin left for this UPI ID')
+            elif not remaining and (remaining is not None or upi_key in paid_upis):
+                flag('over_paid', line, upi_id, raw_amount, 'No unpaid spins left for this UPI ID')
+            elif remaining and amount > max(remaining):
+                flag('over_paid', line, upi_id, raw_amount, f'Exceeds largest unpaid prize ₹{max(remaining)}')
+            else:
+                flag('unmatched', line, upi_id, raw_amount, 'No unpaid spin for this UPI ID and amount')
+        
+        if batch:
+            flush()
+    
+    report['unpaid_remaining'] = sum(len(candidates) for candidates in unpaid.values())
+    for category, rows_flagged in details.items():
+        report[f'{category}_rows'] = rows_flagged
+    return report
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -439,7 +808,10 @@ def submit_upi():
         else:
             c.execute("UPDATE spins SET upi_id = ? WHERE id = ?",
                       (upi_id, spin_id))
-        conn.commit()
+        with admin_events.commit_lock:
+            conn.commit()
+            publish_admin_event('upi_submitted', {'spin_id': spin_id},
+                                deltas={'upi_submitted': 1})
         conn.close()
         
         return jsonify({
@@ -499,7 +871,10 @@ def add_order():
         else:
             c.execute("INSERT INTO orders (order_id, created_at) VALUES (?, ?)",
                       (order_id, timestamp))
-        conn.commit()
+        with admin_events.commit_lock:
+            conn.commit()
+            publish_admin_event('order_added', {'created_at': timestamp},
+                                deltas={'total_orders': 1, 'available_orders': 1})
         conn.close()
         
         return jsonify({
@@ -546,13 +921,8 @@ def admin_logout():
     session.pop('admin_id', None)
     return redirect('/manage/admin/login')
 
-@app.route('/manage/admin')
-@admin_required
-def admin():
-    """Admin panel to view all spins and statistics"""
-    conn = get_db_connection()
-    c = get_cursor(conn)
-    
+def load_admin_stats(c):
+    """Run the admin panel queries and return them as template variables"""
     # Get limited spins with user info (last 10)
     c.execute('''SELECT user_id, prize, timestamp, ip_address, upi_id, order_id 
                  FROM spins ORDER BY timestamp DESC LIMIT 10''')
@@ -603,19 +973,156 @@ def admin():
                      LIMIT 10''')
     user_stats = c.fetchall()
     
+    return {
+        'spins': spins,
+        'total_spins': total_spins,
+        'total_users': total_users,
+        'total_amount': total_amount,
+        'upi_submitted': upi_submitted,
+        'user_stats': user_stats,
+        'total_orders': total_orders,
+        'used_orders': used_orders,
+        'available_orders': available_orders,
+        'all_orders': all_orders
+    }
+
+@app.route('/manage/admin')
+@admin_required
+def admin():
+    """Admin panel to view all spins and statistics"""
+    conn = get_db_connection()
+    c = get_cursor(conn)
+    
+    # The event id must match the snapshot exactly so live updates resume
+    # from it without missing or double counting a write
+    stats, last_event_id = admin_events.snapshot(lambda: load_admin_stats(c))
+    
     conn.close()
     
-    return render_template('admin.html', 
-                         spins=spins,
-                         total_spins=total_spins,
-                         total_users=total_users,
-                         total_amount=total_amount,
-                         upi_submitted=upi_submitted,
-                         user_stats=user_stats,
-                         total_orders=total_orders,
-                         used_orders=used_orders,
-                         available_orders=available_orders,
-                         all_orders=all_orders)
+    return render_template('admin.html', last_event_id=last_event_id, **stats)
+
+@app.route('/manage/admin/events')
+@admin_required
+def admin_events_stream():
+    """Stream live dashboard events to an admin tab (Server-Sent Events)"""
+    # Browsers send Last-Event-ID on reconnect; the first connect passes the
+    # id of the page snapshot so events since the snapshot are replayed
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    q = admin_events.subscribe(last_event_id)
+    
+    def stream():
+        # The login is only checked when the stream opens, so end it after
+        # SSE_STREAM_SECONDS; the browser reconnects through @admin_required
+        # and resumes from Last-Event-ID, or gets the login redirect and stops
+        deadline = time.monotonic() + SSE_STREAM_SECONDS
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    message = q.get(timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                except queue.Empty:
+                    message = ": heartbeat\n\n"
+                yield message
+        finally:
+            admin_events.unsubscribe(q)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/manage/admin/reconcile', methods=['GET', 'POST'])
+@admin_required
+def admin_reconcile():
+    """Reconcile a bank/UPI settlement CSV against unpaid spins"""
+    if request.method == 'GET':
+        return render_template('admin_reconcile.html', window_days=RECONCILE_WINDOW_DAYS)
+    
+    settlement_file = request.files.get('settlement_file')
+    if not settlement_file or not settlement_file.filename:
+        return jsonify({
+            'success': False,
+            'message': 'Please choose a settlement CSV file'
+        }), 400
+    
+    # Stream the upload row by row instead of reading it into memory
+    stream = io.TextIOWrapper(settlement_file.stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(stream)
+    
+    conn = None
+    try:
+        # Reading fieldnames decodes the header, so it can fail like any row
+        columns = map_settlement_columns(reader.fieldnames)
+        if not columns:
+            return jsonify({
+                'success': False,
+                'message': 'Settlement file must have UPI ID, amount and date columns'
+            }), 400
+        
+        conn = get_db_connection()
+        c = get_cursor(conn)
+        report = reconcile_settlement(c, reader, columns)
+        conn.commit()
+    except (UnicodeDecodeError, csv.Error) as e:
+        if conn:
+            conn.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Could not read settlement file: {str(e)}'
+        }), 400
+    finally:
+        if conn:
+            conn.close()
+    
+    return jsonify({
+        'success': True,
+        'message': f"Marked {report['matched']} spins as paid",
+        'report': report
+    })
+
+@app.route('/manage/admin/simulate', methods=['GET', 'POST'])
+@admin_required
+def admin_simulate():
+    """Monte Carlo payout simulation for a prize weight configuration"""
+    if request.method == 'GET':
+        return render_template('admin_simulate.html',
+                               prizes=PRIZES,
+                               probabilities=PRIZE_PROBABILITIES,
+                               jackpot_prize=JACKPOT_PRIZE)
+    
+    # NumPy is only needed here, so import it lazily like psycopg2
+    import simulator
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        if not isinstance(data, dict) or not isinstance(data.get('weights') or {}, dict):
+            raise ValueError('Request must be a JSON object with a weights object')
+        weights = {int(p): float(w) for p, w in (data.get('weights') or {}).items()}
+        if any(p not in PRIZES or not math.isfinite(w) or w < 0 for p, w in weights.items()):
+            raise ValueError('Weights must be finite numbers, 0 or more, for prizes on the wheel')
+        orders = int(data.get('orders') or 0)
+        trials = int(data.get('trials') or 10000)
+        budget = data.get('budget')
+        budget = float(budget) if budget not in (None, '') else None
+        if budget is not None and not math.isfinite(budget):
+            raise ValueError('Budget must be a finite number')
+        
+        result = simulator.simulate_payouts(weights, orders, trials=trials,
+                                            budget=budget, jackpot=JACKPOT_PRIZE)
+        result['check'] = simulator.check_against_sampler(lambda: select_prize(weights), weights)
+    except (TypeError, ValueError, OverflowError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'result': result
+    })
 
 @app.route('/manage/admin/orders')
 @admin_required
@@ -657,7 +1164,7 @@ def admin_spins():
     """View all spins history"""
     conn = get_db_connection()
     c = get_cursor(conn)
-    c.execute('''SELECT user_id, prize, timestamp, ip_address, upi_id, order_id 
+    c.execute('''SELECT user_id, prize, timestamp, ip_address, upi_id, order_id, paid_at 
                  FROM spins ORDER BY timestamp DESC''')
     spins = c.fetchall()
     conn.close()
@@ -677,7 +1184,9 @@ def clear_all_data():
         # Delete all orders
         c.execute("DELETE FROM orders")
         
-        conn.commit()
+        with admin_events.commit_lock:
+            conn.commit()
+            publish_admin_event('data_cleared')
         conn.close()
         
         return jsonify({
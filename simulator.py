@@ -0,0 +1,140 @@
+"""Monte Carlo payout simulator for spin wheel prize configurations
+
+Runs many simulated campaigns at once with NumPy instead of calling
+select_prize() in a Python loop. Each campaign of N orders is one
+multinomial draw over the prize weights, so the cost depends on the
+number of trials and prizes, not on N.
+"""
+import math
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+MAX_TRIALS = 100000
+MAX_ORDERS = 10000000
+
+def normalize_weights(probabilities):
+    """Return (prizes, probabilities) arrays for the enabled prizes"""
+    enabled = [(int(p), float(w)) for p, w in probabilities.items() if w > 0]
+    if not enabled:
+        raise ValueError('At least one prize must have a weight above 0')
+    prizes, weights = zip(*enabled)
+    weights = np.array(weights)
+    return np.array(prizes, dtype=np.int64), weights / weights.sum()
+
+def simulate_payouts(probabilities, orders, trials=10000, budget=None, jackpot=30, seed=None):
+    """Simulate total campaign payout for `orders` spins over `trials` campaigns"""
+    if not 1 <= orders <= MAX_ORDERS:
+        raise ValueError(f'Orders must be between 1 and {MAX_ORDERS}')
+    if not 1 <= trials <= MAX_TRIALS:
+        raise ValueError(f'Trials must be between 1 and {MAX_TRIALS}')
+
+    prizes, p = normalize_weights(probabilities)
+    rng = np.random.default_rng(seed)
+
+    # counts[t, i] = how many times prize i was won in campaign t
+    counts = rng.multinomial(orders, p, size=trials)
+    payouts = counts @ prizes
+
+    if jackpot in prizes:
+        jackpots = counts[:, np.flatnonzero(prizes == jackpot)[0]]
+    else:
+        jackpots = np.zeros(trials, dtype=np.int64)
+
+    result = {
+        'orders': orders,
+        'trials': trials,
+        'expected_payout': float(orders * (p @ prizes)),
+        'mean_payout': float(payouts.mean()),
+        'std_payout': float(payouts.std()),
+        'min_payout': int(payouts.min()),
+        'max_payout': int(payouts.max()),
+        'percentiles': {str(q): float(v) for q, v in zip(PERCENTILES, np.percentile(payouts, PERCENTILES))},
+        'jackpot_prize': jackpot,
+        'mean_jackpots': float(jackpots.mean()),
+        'max_jackpots': int(jackpots.max()),
+        'jackpot_probability': float((jackpots > 0).mean()),
+        'budget': budget,
+        'budget_exceeded_probability': None
+    }
+    if budget is not None:
+        result['budget_exceeded_probability'] = float((payouts > budget).mean())
+    return result
+
+# Chi-square needs about 5 expected hits per bin to be valid
+MIN_EXPECTED = 5
+
+def chi_square_critical(df, z=3.29):
+    """Approximate upper chi-square quantile (Wilson-Hilferty, z=3.29 is ~0.05%)"""
+    h = 2.0 / (9.0 * df)
+    return df * (1 - h + z * math.sqrt(h)) ** 3
+
+def chi_square_bins(expected):
+    """Group prize indexes so every bin expects at least MIN_EXPECTED hits
+
+    Rare prizes (such as a low-weight jackpot) are pooled into one bin. If
+    the pool is still too small it absorbs the next least likely prizes.
+    """
+    order = [int(i) for i in np.argsort(expected)]
+    bins = [[i] for i in order if expected[i] >= MIN_EXPECTED]
+    pooled = [i for i in order if expected[i] < MIN_EXPECTED]
+    if pooled:
+        while expected[pooled].sum() < MIN_EXPECTED and bins:
+            pooled += bins.pop(0)
+        bins.append(pooled)
+    return bins, pooled
+
+def check_against_sampler(sampler, probabilities, draws=20000, seed=None):
+    """Compare the vectorized sampler with the real per-spin sampler
+
+    Draws `draws` prizes from both and runs a chi-square goodness-of-fit
+    test of each against the configured weights, with rare prizes pooled.
+    Each test fails by chance ~0.05% of the time, so ~0.1% per check.
+    """
+    prizes, p = normalize_weights(probabilities)
+    expected = p * draws
+
+    rng = np.random.default_rng(seed)
+    simulated = rng.multinomial(draws, p)
+
+    index = {int(prize): i for i, prize in enumerate(prizes)}
+    observed = np.zeros(len(prizes), dtype=np.int64)
+    for _ in range(draws):
+        observed[index[int(sampler())]] += 1
+
+    bins, pooled = chi_square_bins(expected)
+    df = len(bins) - 1
+
+    def chi_square(counts):
+        binned = np.array([counts[b].sum() for b in bins])
+        binned_expected = np.array([expected[b].sum() for b in bins])
+        return float((((binned - binned_expected) ** 2) / binned_expected).sum())
+
+    if df < 1:
+        # Everything fell into one bin, so there is nothing to test
+        critical = sampler_chi2 = simulated_chi2 = None
+        passed = True
+    else:
+        critical = chi_square_critical(df)
+        sampler_chi2 = chi_square(observed)
+        simulated_chi2 = chi_square(simulated)
+        passed = sampler_chi2 <= critical and simulated_chi2 <= critical
+
+    return {
+        'draws': draws,
+        'df': df,
+        'pooled_prizes': sorted(int(prizes[i]) for i in pooled),
+        'false_failure_rate': 0.001,
+        'critical_value': critical,
+        'sampler_chi_square': sampler_chi2,
+        'simulator_chi_square': simulated_chi2,
+        'passed': passed,
+        'prizes': [
+            {
+                'prize': int(prize),
+                'expected': float(expected[i] / draws),
+                'sampler': float(observed[i] / draws),
+                'simulator': float(simulated[i] / draws)
+            }
+            for i, prize in enumerate(prizes)
+        ]
+    }